@@ -21,6 +21,7 @@ License:     MIT License
 Date:        20.03.2025
 Dependencies:
     - pyserial
+    - pyserial-asyncio-fast (optional, for AsyncLoRaModule in E52_xxxNW22S_async)
 Compatibility:
     - Windows | Linux | macOS
 
@@ -55,22 +56,151 @@ Compatibility:
 """
 
 import re
+import os
+import collections
+import selectors
 import serial
 import threading
 import logging
 import time
-from sys import getsizeof
-import struct
 
-class LoRaModule:
+# Default expected response of a set/command operation.
+_EXPECTED_OK = "OK"
+
+# Declarative AT command table: (method name, AT command, parameters).
+#   parameters None -> query method sending "AT+CMD=?"
+#   parameters ""   -> parameterless command "AT+CMD"
+#   otherwise       -> the method's parameter list, sent as "AT+CMD=p1,p2,..."
+# Every entry is compiled by _with_at_methods into a specialised method on LoRaModule
+# and AsyncLoRaModule, so constant commands are bytes literals and set commands are a single f-string.
+_AT_METHODS = (
+    ("reset",             "RESET", ""),
+    ("default_settings",  "DEFAULT", ""),
+    ("iap",               "IAP", ""),
+    ("get_info",          "INFO", None),
+    ("get_dev_type",      "DEVTYPE", None),
+    ("get_fwcode",        "FWCODE", None),
+    ("get_power",         "POWER", None),
+    ("set_power",         "POWER", "power, save=0"),
+    ("get_channel",       "CHANNEL", None),
+    ("set_channel",       "CHANNEL", "channel, save=0"),
+    ("get_uart",          "UART", None),
+    ("set_uart",          "UART", "baud, parity"),
+    ("get_rate",          "RATE", None),
+    ("set_rate",          "RATE", "rate"),
+    ("get_option",        "OPTION", None),
+    ("set_option",        "OPTION", "option, save=0"),
+    ("get_panid",         "PANID", None),
+    ("set_panid",         "PANID", "panid, save=0"),
+    ("get_type",          "TYPE", None),
+    ("set_type",          "TYPE", "node_type"),
+    ("get_src_addr",      "SRC_ADDR", None),
+    ("set_src_addr",      "SRC_ADDR", "addr, save=0"),
+    ("get_dst_addr",      "DST_ADDR", None),
+    ("set_dst_addr",      "DST_ADDR", "addr, save=0"),
+    ("get_src_port",      "SRC_PORT", None),
+    ("set_src_port",      "SRC_PORT", "port, save=0"),
+    ("get_dst_port",      "DST_PORT", None),
+    ("set_dst_port",      "DST_PORT", "port, save=0"),
+    ("get_member_rad",    "MEMBER_RAD", None),
+    ("set_member_rad",    "MEMBER_RAD", "rad, save=0"),
+    ("get_nonmember_rad", "NONMEMBER_RAD", None),
+    ("set_nonmember_rad", "NONMEMBER_RAD", "rad, save=0"),
+    ("get_csma_rng",      "CSMA_RNG", None),
+    ("set_csma_rng",      "CSMA_RNG", "rng"),
+    ("get_router_score",  "ROUTER_SCORE", None),
+    ("set_router_score",  "ROUTER_SCORE", "score"),
+    ("get_head",          "HEAD", None),
+    ("set_head",          "HEAD", "enable"),
+    ("get_back",          "BACK", None),
+    ("set_back",          "BACK", "enable"),
+    ("get_security",      "SECURITY", None),
+    ("set_security",      "SECURITY", "enable"),
+    ("get_reset_aux",     "RESET_AUX", None),
+    ("set_reset_aux",     "RESET_AUX", "enable"),
+    ("get_reset_time",    "RESET_TIME", None),
+    ("set_reset_time",    "RESET_TIME", "reset_time"),
+    ("get_filter_time",   "FILTER_TIME", None),
+    ("set_filter_time",   "FILTER_TIME", "time_val"),
+    ("get_ack_time",      "ACK_TIME", None),
+    ("set_ack_time",      "ACK_TIME", "time_val"),
+    ("get_router_time",   "ROUTER_TIME", None),
+    ("set_router_time",   "ROUTER_TIME", "time_val"),
+    ("group_add",         "GROUP_ADD", "group"),
+    ("group_del",         "GROUP_DEL", "group"),
+    ("group_clear",       "GROUP_CLR", "enable"),
+    ("router_clear",      "ROUTER_CLR", "enable"),
+    ("router_save",       "ROUTER_SAVE", "enable"),
+    ("router_read",       "ROUTER_READ", "enable"),
+    ("get_mac",           "MAC", None),
+    ("get_key",           "KEY", None),
+    ("set_key",           "KEY", "key"),
+)
+
+
+def _at_method_source(name, command, params):
     """
-    A Python library for interacting with the E52-xxxNW22S LoRa module via UART using AT commands,
-    while carefully splitting mixed lines so asynchronous messages are never merged with
-    command responses. For user data sends, only the line containing 'SUCCESS' is returned;
-    all other lines received during that window are forwarded to the async callback.
+    Return the source of the method for one _AT_METHODS entry.
     """
+    if params is None:
+        call = f"self._send_at_command({f'AT+{command}=?'.encode('ascii')!r}, is_query=True)"
+        return f"def {name}(self):\n    return {call}\n"
+    if not params:
+        call = f"self._send_at_command({f'AT+{command}'.encode('ascii')!r})"
+        return f"def {name}(self):\n    return {call}\n"
+    names = [p.split("=")[0].strip() for p in params.split(",")]
+    fields = ",".join("{" + n + "}" for n in names)
+    call = f"self._send_at_command(f'AT+{command}={fields}'.encode('utf-8'))"
+    return f"def {name}(self, {params}):\n    return {call}\n"
+
+
+def _with_at_methods(cls):
+    """
+    Class decorator compiling one method per _AT_METHODS entry onto 'cls'.
+    """
+    for name, command, params in _AT_METHODS:
+        namespace = {}
+        exec(_at_method_source(name, command, params), namespace)
+        method = namespace[name]
+        method.__qualname__ = f"{cls.__name__}.{name}"
+        method.__module__ = cls.__module__
+        if params is None:
+            method.__doc__ = f"Query AT+{command}."
+        else:
+            method.__doc__ = f"Send AT+{command}" + (f" with ({params})." if params else ".")
+        setattr(cls, name, method)
+    return cls
 
-    def __init__(self, port="/dev/cu.usbserial-2110", baudrate=115200, timeout=1, retries=3, log_enabled=True):
+
+class _LoRaCore:
+    """
+    Line splitting, response matching and result handling shared by LoRaModule and
+    AsyncLoRaModule (see E52_xxxNW22S_async). Subclasses own the transport and the
+    waiting: they provide _begin_response, _wait_for_response, _dispatch_segments
+    and _deliver_async.
+    """
+
+    # Quiet period that ends a (possibly multi-line) query reply.
+    _QUERY_SETTLE = 0.1
+
+    # Markers a mixed line is split before (unless they start the line), see _split_mixed_line.
+    _SPLIT_RE = re.compile(rb'(AT\+|OK|SUCCESS)', re.IGNORECASE)
+
+    # Tokens marking a line as a command response (one case-insensitive scan per line).
+    _RESP_RE = re.compile(rb'AT\+|OK|SUCCESS|=', re.IGNORECASE)
+
+    # Maximum number of lines collected for one command/send.
+    _RESPONSE_MAXLEN = 256
+
+    # Number of most recent lines a command/send forwarded as async, kept for its
+    # error message.
+    _REJECTED_TAIL_LEN = 16
+
+    # Number of async lines kept for drain_async() when no async_callback is set, and
+    # waiting to be passed to the callback when one is.
+    _ASYNC_QUEUE_LEN = 1024
+
+    def __init__(self, port, baudrate, timeout, retries, log_enabled):
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
@@ -81,458 +211,795 @@ class LoRaModule:
         self.logger = logging.getLogger("LoRaModule")
         self.logger.disabled = not self.log_enabled
 
-        # A lock to ensure only one command (or send operation) at a time.
-        self._cmd_lock = threading.Lock()
-
-        # Event + buffer used to collect lines belonging to the active command/send.
-        self._response_event = threading.Event()
-        self._response_lines = []
+        # Buffer collecting the lines belonging to the active command/send. It is
+        # bounded and drops its oldest lines when full (see overflow_count).
+        self._response_lines = collections.deque(maxlen=self._RESPONSE_MAXLEN)
+        self._response_overflow = False
+
+        # Lines dropped by each bounded buffer, one counter per buffer so that each one
+        # has a single writer (or is updated under one lock); see overflow_count.
+        self._response_dropped = 0
+        self._callback_dropped = 0
+        self._queue_dropped = 0
+
+        # Filter deciding which lines the active command owns (None: all of them) and
+        # its completion test, both run by the reader on each line; index of the first
+        # line passing the test and number of lines collected so far.
+        self._response_filter = None
+        self._match = None
+        self._match_idx = None
+        self._received = 0
+        self._rejected_tail = collections.deque(maxlen=self._REJECTED_TAIL_LEN)
+
+        # Raw bytes read from the port that do not yet form a complete line.
+        self._rx_buf = bytearray()
 
         # Flag indicating we have an active command or send in progress.
         self._waiting_for_cmd = False
 
+        # Incremented for every command/send; lines read before it started are never
+        # attributed to it, which replaces flushing the input buffer per command.
+        self._cmd_seq = 0
+
         # Optional callback for truly asynchronous lines (not part of an active command).
         self.async_callback = None
 
-        # Control flag for the continuous reader thread.
-        self._running = True
-
-        try:
-            self.ser = serial.Serial(port, baudrate, timeout=timeout)
-            self.logger.info("Opened serial port %s at %d baud.", port, baudrate)
-        except Exception as e:
-            self.logger.error("Failed to open serial port %s: %s", port, str(e))
-            raise
-
-        # Launch background reader thread
-        self._reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
-        self._reader_thread.start()
+        # Async lines received while no callback is set, for drain_async().
+        self._async_queue = collections.deque(maxlen=self._ASYNC_QUEUE_LEN)
 
     def _split_mixed_line(self, line):
         """
-        If a single line from the module is something like:
-            "Hello Module A!AT+OPTION=OK"
+        If a single (raw bytes) line from the module is something like:
+            b"Hello Module A!AT+OPTION=OK"
         we split it into separate chunks:
-            ["Hello Module A!", "AT+OPTION=OK"]
+            [b"Hello Module A!", b"AT+OPTION=OK"]
 
         We also split on "OK", "SUCCESS", etc., so that lines like
-            "Hello Module A!SUCCESS"
-        become ["Hello Module A!", "SUCCESS"].
+            b"Hello Module A!SUCCESS"
+        become [b"Hello Module A!", b"SUCCESS"].
 
         Return a list of separate segments, each treated as if it came on its own line.
         """
-        # We'll do repeated text replacements to insert a "<SPLIT>" marker
-        # before "AT+", "OK", "SUCCESS" if they're not at the beginning,
-        # then split on "<SPLIT>" to produce separate lines.
-
-        def insert_marker(pattern, marker, txt):
-            # Insert marker before pattern unless pattern is at start of text
-            return re.sub(
-                rf'(?<!^)({pattern})',
-                f'{marker}\\1',
-                txt,
-                flags=re.IGNORECASE
-            )
+        # Most lines carry a single message: return them without splitting
+        if self._SPLIT_RE.search(line, 1) is None:
+            line = line.strip()
+            return [line] if line else []
 
-        text = line
-        text = insert_marker("AT\\+", "<SPLIT>", text)
-        text = insert_marker("OK", "<SPLIT>", text)
-        text = insert_marker("SUCCESS", "<SPLIT>", text)
+        # One pass splits before every "AT+", "OK" or "SUCCESS" that is not at the
+        # beginning: the scan starts after the first byte, which is put back in front
+        # of the first piece. The capturing group keeps the markers, so the result
+        # alternates [text, marker, text, marker, text, ...]; each marker starts a new segment.
+        parts = self._SPLIT_RE.split(line[1:])
+        pieces = [line[:1] + parts[0]]
+        pieces.extend(marker + text for marker, text in zip(parts[1::2], parts[2::2]))
 
-        parts = text.split("<SPLIT>")
-        segments = [p.strip() for p in parts if p.strip()]
+        segments = [p for p in (p.strip() for p in pieces) if p]
 
         return segments
 
-    def _reader_loop(self):
+    def _feed(self, chunk):
         """
-        Continuously read from the serial port, carefully splitting any "mixed" lines into segments.
-        If we are waiting for a command, lines that pass our filter go into the command buffer,
-        otherwise they go to async_callback.
+        Append raw bytes from the port to the receive buffer and dispatch every complete line.
         """
-        while self._running:
-            try:
-                line = self.ser.readline()
-                if not line:
-                    continue
+        # Bytes belong to whichever command was active when they were read
+        seq = self._cmd_seq
+        self._rx_buf += chunk
+        if b'\n' not in chunk:
+            return
+
+        # Cut every complete line out of this read through a memoryview, without its
+        # CR/LF, so each line is copied exactly once and the usual strip() is a no-op.
+        # Then hand the whole batch over at once (one lock round-trip and wakeup per read).
+        buf = self._rx_buf
+        find = buf.find
+        line_segments = self._line_segments
+        segments = []
+        extend = segments.extend
+        start = 0
+        with memoryview(buf) as view:
+            while True:
+                end = find(b'\n', start)
+                if end == -1:
+                    break
+                stop = end - 1 if end > start and buf[end - 1] == 0x0D else end
+                extend(line_segments(view[start:stop]))
+                start = end + 1
+        # Keep only the unfinished line
+        del buf[:start]
+        if segments:
+            self._dispatch_segments(segments, seq)
+
+    def _line_segments(self, line):
+        """
+        Return the non-empty segments of one complete line (a memoryview without its
+        trailing CR/LF) from the serial port. Segments stay bytes; they are only decoded when handed to
+        the user (command result, async_callback, drain_async or the log).
+        """
+        # Split into separate segments if the line merges e.g. "Hello Module A!AT+OPTION=OK";
+        # the segments come back stripped and non-empty
+        return self._split_mixed_line(bytes(line).strip())
 
-                decoded_line = line.decode('utf-8', errors='ignore').strip()
-                # Split into separate segments if the line merges e.g. "Hello Module A!AT+OPTION=OK"
-                segments = self._split_mixed_line(decoded_line)
+    def _collect(self, segments):
+        """
+        Append the segments owned by the active command to its bounded buffer and test
+        them against its completion test until one passes. If the oldest lines get
+        dropped, count them, flag the command and keep the match index on the same line.
 
-                for seg in segments:
-                    seg = seg.strip()
-                    if not seg:
-                        continue
-                    if self._waiting_for_cmd:
-                        # Temporarily store this line
-                        self._response_lines.append(seg)
-                        # Signal that new data arrived
-                        self._response_event.set()
-                    else:
-                        # Asynchronous data
-                        if self.async_callback:
-                            self.async_callback(seg)
-                        else:
-                            self.logger.info("Async: %s", seg)
+        Returns the segments the command does not own, to be dispatched as async lines
+        right away instead of after the command completes.
+        """
+        rejected = []
+        keep = self._response_filter
+        if keep is not None:
+            kept = []
+            for seg in segments:
+                (kept if keep(seg) else rejected).append(seg)
+            if rejected:
+                self._rejected_tail.extend(rejected)
+            if not kept:
+                return rejected
+            segments = kept
+
+        lines = self._response_lines
+        dropped = len(lines) + len(segments) - lines.maxlen
+        if dropped > 0:
+            self._response_dropped += dropped
+            self._response_overflow = True
+            if self._match_idx is not None:
+                self._match_idx = max(0, self._match_idx - dropped)
+        lines.extend(segments)
+        self._received += len(segments)
+
+        match = self._match
+        if match is not None and self._match_idx is None:
+            for i, seg in enumerate(segments):
+                if match(seg):
+                    self._match_idx = max(0, len(lines) - len(segments) + i)
+                    break
+        return rejected
+
+    @property
+    def overflow_count(self):
+        """Number of received lines dropped because a buffer was full."""
+        return self._response_dropped + self._callback_dropped + self._queue_dropped
+
+    def _dispatch_async(self, segments):
+        """
+        Pass segments that do not belong to a command to async_callback. Without a
+        callback they are queued for drain_async() and only logged if INFO is enabled.
+        Segments stay bytes until they are handed out, so lines dropped from a full
+        queue are never decoded.
+        """
+        if self.async_callback:
+            self._deliver_async(segments)
+            return
+        self._queue_async(segments)
 
-            except Exception as e:
-                self.logger.error("Error in reader loop: %s", e)
+    def _queue_async(self, segments):
+        """
+        Keep async lines for drain_async().
+        """
+        dropped = len(self._async_queue) + len(segments) - self._async_queue.maxlen
+        if dropped > 0:
+            self._queue_dropped += dropped
+        self._async_queue.extend(segments)
+        if self.logger.isEnabledFor(logging.INFO):
+            for seg in segments:
+                self.logger.info("Async: %s", seg.decode('utf-8', errors='ignore'))
+
+    def drain_async(self):
+        """
+        Return (and remove) the async lines received while no async_callback was set.
+        Only the most recent _ASYNC_QUEUE_LEN lines are kept.
+        """
+        lines = []
+        popleft = self._async_queue.popleft
+        try:
+            while True:
+                lines.append(popleft().decode('utf-8', errors='ignore'))
+        except IndexError:
+            pass
+        return lines
 
     def _default_response_filter(self, line):
         """
-        Decide if a received line belongs to the active command vs. being an async line.
+        Decide if a received (bytes) line belongs to the active command vs. being an async line.
         Typically, lines containing 'AT+', 'OK', '=' or 'SUCCESS' are command responses.
         """
-        line_upper = line.upper()
-        if "AT+" in line_upper:
-            return True
-        if "OK" in line_upper:
-            return True
-        if "SUCCESS" in line_upper:
-            return True
-        if "=" in line:
-            return True
-        return False
+        return self._RESP_RE.search(line) is not None
 
-    def _format_command(self, command, *params, query=False, remote=False):
+    def _reset_response(self, match, response_filter):
         """
-        Build the AT command string.
+        Reset the response state for a new command/send (see _begin_response).
         """
-        prefix = "++AT+" if remote else "AT+"
-        if query:
-            return f"{prefix}{command}=?"
-        elif params:
-            param_str = ",".join(str(p) for p in params)
-            return f"{prefix}{command}={param_str}"
-        else:
-            return f"{prefix}{command}"
-
-    def _send_at_command(
-        self,
-        command_str,
-        is_query=False,
-        expected_response="OK",
-        cmd_timeout=2,
-        response_filter=None
-    ):
+        self._response_lines = collections.deque(maxlen=self._RESPONSE_MAXLEN)
+        self._response_overflow = False
+        self._response_filter = response_filter
+        self._match = match
+        self._match_idx = None
+        self._received = 0
+        self._rejected_tail.clear()
+
+    def _end_response(self):
         """
-        Send an AT command and wait for its response. The lines read while waiting
-        are tested with 'response_filter' to see if they belong to this command.
-        If a line doesn't pass the filter, it's forwarded to async_callback.
+        Stop collecting lines for the active command/send.
         """
-        if response_filter is None:
-            response_filter = self._default_response_filter
-
-        self.logger.debug("Sending command: %s", command_str)
-
-        with self._cmd_lock:
-            self.ser.reset_input_buffer()
-            self._response_lines = []
-            self._response_event.clear()
-            self._waiting_for_cmd = True
-
-            # Send command
-            self.ser.write(command_str.encode('utf-8'))
-
-            # Wait for incoming lines up to cmd_timeout
-            end_time = time.time() + cmd_timeout
-            while time.time() < end_time:
-                self._response_event.wait(0.2)
-                self._response_event.clear()
-
-            # Mark command as done
-            self._waiting_for_cmd = False
-
-            # Filter out lines that are truly for this command
-            valid_for_cmd = []
-            async_lines = []
-            for ln in self._response_lines:
-                if response_filter(ln):
-                    valid_for_cmd.append(ln)
-                else:
-                    async_lines.append(ln)
-
-            # If any lines are obviously async, push them out
-            if async_lines and self.async_callback:
-                for a_ln in async_lines:
-                    self.async_callback(a_ln)
-
-            response = "\n".join(valid_for_cmd)
-            if not is_query and expected_response:
-                # For set/command operations, ensure we got the expected response
-                if expected_response.upper() not in response.upper():
-                    raise Exception(
-                        f"Unexpected response for cmd '{command_str}': {response}"
-                    )
-
-            return response
+        self._waiting_for_cmd = False
+        self._response_filter = None
+        self._match = None
 
-    # ----------------------------------------------------------------------
-    # Sending user data (i.e., not AT commands)
-    # ----------------------------------------------------------------------
-    def send_message(self, message, expect="SUCCESS", timeout=5):
+    def _as_bytes(self, data):
         """
-        Send a user data message (plain text). Wait for 'expect' (e.g. "SUCCESS").
-        After the read loop finishes, we parse lines:
-          • If a line contains the expect token, that's the "send result".
-          • All other lines are treated as asynchronous data and passed to async_callback.
+        Return the bytes to write for 'data': str is UTF-8 encoded, bytes-like objects
+        (bytes, bytearray, memoryview) are passed through without a copy.
+        """
+        if isinstance(data, str):
+            return data.encode('utf-8')
+        return data
 
-        If no line has the expect token, we raise an Exception.
+    def _log_sent(self, what, data):
         """
-        with self._cmd_lock:
-            self.ser.reset_input_buffer()
-            self._response_lines = []
-            self._response_event.clear()
-            self._waiting_for_cmd = True
+        Debug-log outgoing 'data' as text; bytes are only decoded when DEBUG is enabled.
+        """
+        if self.logger.isEnabledFor(logging.DEBUG):
+            if not isinstance(data, str):
+                data = bytes(data).decode('utf-8', errors='replace')
+            self.logger.debug("Sending %s: %s", what, data)
 
-            if isinstance(message, str):
-                self.ser.write(message.encode('utf-8'))
-            else:
-                self.ser.write(message)
-            end_time = time.time() + timeout
-            while time.time() < end_time:
-                self._response_event.wait(0.2)
-                self._response_event.clear()
-
-            self._waiting_for_cmd = False
-
-            expect_upper = expect.upper() if expect else ""
-            success_line = None
-            async_lines = []
-
-            # Check each collected line; if it has the success token, we store it as success
-            # otherwise, we treat it as async data
-            for ln in self._response_lines:
-                if expect_upper and expect_upper in ln.upper():
-                    success_line = ln
-                else:
-                    async_lines.append(ln)
+    def _command_plan(self, is_query, expected_response, response_filter, match):
+        """
+        Resolve a command's response filter and completion test: returns
+        (response_filter, match, settle, default_match). With the default completion
+        test (default_match), a match means the expected response arrived.
+        """
+        if response_filter is None:
+            response_filter = self._default_response_filter
+        if match is not None:
+            return response_filter, match, None, False
+        match, settle = self._command_match(is_query, expected_response, response_filter)
+        return response_filter, match, settle, True
 
-            # Send async lines to the callback
-            if async_lines and self.async_callback:
-                for a_ln in async_lines:
-                    self.async_callback(a_ln)
+    def _command_match(self, is_query, expected_response, response_filter):
+        """
+        Build the default completion test for a command: returns (match, settle).
+        Only lines passing response_filter are collected, so a set/command operation
+        completes on the first collected line containing 'expected_response'.
+        """
+        if is_query or not expected_response:
+            return response_filter, self._QUERY_SETTLE
+        return self._token_match(expected_response), None
 
-            # If no line contained the success token, raise an error
-            if not success_line and expect_upper:
+    def _command_response(self, command_str, lines, is_query, expected_response, found=None):
+        """
+        Build a command's response from the lines collected for it (async lines were
+        already forwarded by the reader) and check for the expected response.
+        'found' tells whether the expected response was already seen while collecting;
+        if None, the lines are checked one by one.
+        """
+        if self._response_overflow:
+            if isinstance(command_str, bytes):
+                command_str = command_str.decode('utf-8', errors='replace')
+            self._raise_overflow(f"cmd '{command_str}'")
+
+        response = "\n".join(ln.decode('utf-8', errors='ignore') for ln in lines)
+        if not is_query and expected_response:
+            # For set/command operations, ensure we got the expected response
+            if found is None:
+                expected_upper = self._as_bytes(expected_response).upper()
+                found = any(expected_upper in ln.upper() for ln in lines)
+            if not found:
+                if isinstance(command_str, bytes):
+                    command_str = command_str.decode('utf-8', errors='replace')
                 raise Exception(
-                    f"send_message failed: no '{expect}' token found in:\n"
-                    + "\n".join(self._response_lines)
+                    f"Unexpected response for cmd '{command_str}': {response}"
                 )
 
-            # Return whichever line had the success token
-            return success_line if success_line else ""
+        return response
 
-    def send_message_loop(self, messages, delay=1, expect="SUCCESS", timeout=5):
+    def _raise_overflow(self, what):
         """
-        Send multiple user-data messages in a loop.
-        Return the list of responses or errors.
+        Fail a command/send whose response buffer dropped lines ('what' names it).
         """
-        results = []
-        for msg in messages:
-            try:
-                resp = self.send_message(msg, expect=expect, timeout=timeout)
-                results.append(resp)
-            except Exception as e:
-                results.append(f"Error sending '{msg}': {e}")
-            time.sleep(delay)
-        return results
-
-    # ----------------------------------------------------------------------
-    # AT COMMANDS
-    # ----------------------------------------------------------------------
-    def reset(self):
-        return self._send_at_command(self._format_command("RESET"), is_query=False)
-
-    def default_settings(self):
-        return self._send_at_command(self._format_command("DEFAULT"), is_query=False)
-
-    def iap(self):
-        return self._send_at_command(self._format_command("IAP"), is_query=False)
-
-    def get_info(self):
-        return self._send_at_command(self._format_command("INFO", query=True), is_query=True)
-
-    def get_dev_type(self):
-        return self._send_at_command(self._format_command("DEVTYPE", query=True), is_query=True)
+        raise Exception(
+            f"Response for {what} overflowed the {self._RESPONSE_MAXLEN}-line "
+            f"buffer; it may be truncated"
+        )
 
-    def get_fwcode(self):
-        return self._send_at_command(self._format_command("FWCODE", query=True), is_query=True)
-
-    def get_power(self):
-        return self._send_at_command(self._format_command("POWER", query=True), is_query=True)
-
-    def set_power(self, power, save=0):
-        return self._send_at_command(self._format_command("POWER", power, save), is_query=False)
-
-    def get_channel(self):
-        return self._send_at_command(self._format_command("CHANNEL", query=True), is_query=True)
-
-    def set_channel(self, channel, save=0):
-        return self._send_at_command(self._format_command("CHANNEL", channel, save), is_query=False)
-
-    def get_uart(self):
-        return self._send_at_command(self._format_command("UART", query=True), is_query=True)
-
-    def set_uart(self, baud, parity):
-        return self._send_at_command(self._format_command("UART", baud, parity), is_query=False)
-
-    def get_rate(self):
-        return self._send_at_command(self._format_command("RATE", query=True), is_query=True)
-
-    def set_rate(self, rate):
-        return self._send_at_command(self._format_command("RATE", rate), is_query=False)
-
-    def get_option(self):
-        return self._send_at_command(self._format_command("OPTION", query=True), is_query=True)
-
-    def set_option(self, option, save=0):
-        return self._send_at_command(self._format_command("OPTION", option, save), is_query=False)
-
-    def get_panid(self):
-        return self._send_at_command(self._format_command("PANID", query=True), is_query=True)
-
-    def set_panid(self, panid, save=0):
-        return self._send_at_command(self._format_command("PANID", panid, save), is_query=False)
-
-    def get_type(self):
-        return self._send_at_command(self._format_command("TYPE", query=True), is_query=True)
-
-    def set_type(self, node_type):
-        return self._send_at_command(self._format_command("TYPE", node_type), is_query=False)
+    def _token_match(self, expect):
+        """
+        Completion test for a user data send or a command: the first line containing
+        'expect' (case-insensitive, without upper-casing every line).
+        """
+        expect = bytes(self._as_bytes(expect)) if expect else b""
+        if not expect:
+            return None
+        return re.compile(re.escape(expect), re.IGNORECASE).search
 
-    def get_src_addr(self):
-        return self._send_at_command(self._format_command("SRC_ADDR", query=True), is_query=True)
+    def _send_filter(self, match):
+        """
+        Response filter for a user data send: it owns only the first line satisfying
+        'match', every other line is forwarded as async data as soon as it arrives.
+        """
+        taken = False
 
-    def set_src_addr(self, addr, save=0):
-        return self._send_at_command(self._format_command("SRC_ADDR", addr, save), is_query=False)
+        def keep(ln):
+            nonlocal taken
+            if taken or match is None or not match(ln):
+                return False
+            taken = True
+            return True
+        return keep
 
-    def get_dst_addr(self):
-        return self._send_at_command(self._format_command("DST_ADDR", query=True), is_query=True)
+    def _send_result(self, lines, success_idx, expect):
+        """
+        Return the send result: the only line collected for the send.
+        """
+        # Cannot happen with _send_filter (one line at most), but a send never returns
+        # normally after losing lines
+        if self._response_overflow:
+            self._raise_overflow("send_message")
+
+        success_line = None
+        if success_idx is not None:
+            success_line = lines[success_idx].decode('utf-8', errors='ignore')
+
+        # If no line contained the success token, raise an error listing the last lines
+        # received (they were already forwarded as async data)
+        if not success_line and expect:
+            if not isinstance(expect, str):
+                expect = bytes(expect).decode('utf-8', errors='replace')
+            raise Exception(
+                f"send_message failed: no '{expect}' token found in:\n"
+                + "\n".join(ln.decode('utf-8', errors='ignore') for ln in self._rejected_tail)
+            )
 
-    def set_dst_addr(self, addr, save=0):
-        return self._send_at_command(self._format_command("DST_ADDR", addr, save), is_query=False)
+        # Return whichever line had the success token
+        return success_line if success_line else ""
 
-    def get_src_port(self):
-        return self._send_at_command(self._format_command("SRC_PORT", query=True), is_query=True)
+    def _paced(self, messages, delay, rate_hz):
+        """
+        Schedule send_message_loop(): yield (pause, message), where 'pause' is how long
+        to sleep before sending 'message' to keep the sends 'delay' seconds apart (or
+        1/rate_hz). It is computed when the message is requested, i.e. after the
+        previous send completed.
+        """
+        if rate_hz:
+            delay = 1 / rate_hz
+        next_t = time.monotonic()
+        for i, msg in enumerate(messages):
+            pause = 0
+            if i:
+                next_t += delay
+                pause = next_t - time.monotonic()
+                if pause <= 0:
+                    next_t -= pause
+            yield pause, msg
+
+    def _configure_plan(self, settings):
+        """
+        Build configure()'s batch: returns (commands, batch, response_filter, match),
+        or None when there is nothing to set.
+        """
+        commands = self._configure_commands(settings)
+        if not commands:
+            return None
+        batch = b"\r\n".join(commands)
+        response_filter = self._default_response_filter
 
-    def set_src_port(self, port, save=0):
-        return self._send_at_command(self._format_command("SRC_PORT", port, save), is_query=False)
+        self._log_sent("batch", batch)
+        return commands, batch, response_filter, self._configure_match(len(commands))
 
-    def get_dst_port(self):
-        return self._send_at_command(self._format_command("DST_PORT", query=True), is_query=True)
+    def _configure_result(self, batch, lines, done_idx):
+        """
+        Return configure()'s response if the batch was fully acknowledged. Otherwise
+        forward its replies as async lines, so none of them (e.g. a late OK) is taken
+        for the reply of a command re-sent one by one, and return None.
+        """
+        if done_idx is not None:
+            return self._command_response(batch, lines, False, _EXPECTED_OK, found=True)
+        if lines:
+            self._dispatch_async(list(lines))
+        self.logger.debug("Batch not fully acknowledged, sending commands one by one")
+        return None
+
+    def _configure_commands(self, settings):
+        """
+        Build the encoded set commands for configure().
+        """
+        commands = []
+        for name, params in settings.items():
+            if not isinstance(params, (tuple, list)):
+                params = (params,)
+            param_str = ",".join(map(str, params))
+            commands.append(f"AT+{name.upper()}={param_str}".encode('utf-8'))
+        return commands
+
+    def _configure_match(self, count):
+        """
+        Completion test for configure(): true on the line carrying the count-th OK.
+        Only lines that passed the response filter reach the completion test.
+        """
+        acked = 0
 
-    def set_dst_port(self, port, save=0):
-        return self._send_at_command(self._format_command("DST_PORT", port, save), is_query=False)
+        def match(ln):
+            nonlocal acked
+            if b"OK" in ln.upper():
+                acked += 1
+            return acked >= count
+        return match
 
-    def get_member_rad(self):
-        return self._send_at_command(self._format_command("MEMBER_RAD", query=True), is_query=True)
 
-    def set_member_rad(self, rad, save=0):
-        return self._send_at_command(self._format_command("MEMBER_RAD", rad, save), is_query=False)
+@_with_at_methods
+class LoRaModule(_LoRaCore):
+    """
+    A Python library for interacting with the E52-xxxNW22S LoRa module via UART using AT commands,
+    while carefully splitting mixed lines so asynchronous messages are never merged with
+    command responses. For user data sends, only the line containing 'SUCCESS' is returned;
+    all other lines received during that window are forwarded to the async callback.
+    """
 
-    def get_nonmember_rad(self):
-        return self._send_at_command(self._format_command("NONMEMBER_RAD", query=True), is_query=True)
+    # How often (seconds) the reader wakes up with no traffic to check for close().
+    _READ_POLL = 0.5
 
-    def set_nonmember_rad(self, rad, save=0):
-        return self._send_at_command(self._format_command("NONMEMBER_RAD", rad, save), is_query=False)
+    def __init__(self, port="/dev/cu.usbserial-2110", baudrate=115200, timeout=1, retries=3, log_enabled=True):
+        super().__init__(port, baudrate, timeout, retries, log_enabled)
 
-    def get_csma_rng(self):
-        return self._send_at_command(self._format_command("CSMA_RNG", query=True), is_query=True)
+        # A lock to ensure only one command (or send operation) at a time.
+        self._cmd_lock = threading.Lock()
 
-    def set_csma_rng(self, rng):
-        return self._send_at_command(self._format_command("CSMA_RNG", rng), is_query=False)
+        # Condition guarding the response state: the reader notifies it once the
+        # active command's reply is complete (and while the reply settles).
+        self._response_cv = threading.Condition()
 
-    def get_router_score(self):
-        return self._send_at_command(self._format_command("ROUTER_SCORE", query=True), is_query=True)
+        # Async lines waiting for async_callback, which runs on its own thread so a slow
+        # callback never stalls the reader.
+        self._callback_cv = threading.Condition()
+        self._callback_queue = collections.deque(maxlen=self._ASYNC_QUEUE_LEN)
 
-    def set_router_score(self, score):
-        return self._send_at_command(self._format_command("ROUTER_SCORE", score), is_query=False)
+        # Control flag for the continuous reader and callback threads.
+        self._running = True
 
-    def get_head(self):
-        return self._send_at_command(self._format_command("HEAD", query=True), is_query=True)
+        try:
+            # The port's read timeout only paces the reader thread: cap it (and replace
+            # 0/None, which would spin or block forever) so close() is noticed quickly.
+            read_timeout = min(timeout, self._READ_POLL) if timeout else self._READ_POLL
+            self.ser = serial.Serial(port, baudrate, timeout=read_timeout)
+            self.logger.info("Opened serial port %s at %d baud.", port, baudrate)
+        except Exception as e:
+            self.logger.error("Failed to open serial port %s: %s", port, str(e))
+            raise
 
-    def set_head(self, enable):
-        return self._send_at_command(self._format_command("HEAD", enable), is_query=False)
+        # On POSIX, wait on the port's file descriptor (epoll/kqueue) so the reader only
+        # wakes up when bytes arrive, or when close() writes to the wakeup pipe. Ports
+        # without a real fd (Windows, URL handlers) fall back to blocking pyserial reads.
+        self._sel = None
+        if os.name == "posix":
+            sel = None
+            wake = ()
+            try:
+                self._fd = self.ser.fileno()
+                sel = selectors.DefaultSelector()
+                sel.register(self._fd, selectors.EVENT_READ)
+                wake = os.pipe()
+                sel.register(wake[0], selectors.EVENT_READ)
+                self._sel = sel
+                self._wake_r, self._wake_w = wake
+            except (AttributeError, OSError, ValueError):
+                if sel is not None:
+                    sel.close()
+                for fd in wake:
+                    os.close(fd)
+
+        # Launch background callback and reader threads
+        self._callback_thread = threading.Thread(target=self._callback_loop, daemon=True)
+        self._callback_thread.start()
+        self._reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self._reader_thread.start()
 
-    def get_back(self):
-        return self._send_at_command(self._format_command("BACK", query=True), is_query=True)
+    def _reader_loop(self):
+        """
+        Continuously read from the serial port, carefully splitting any "mixed" lines into segments.
+        If we are waiting for a command, lines that pass our filter go into the command buffer,
+        otherwise they go to async_callback.
+        """
+        # Bound once: the port, selector and handlers do not change while the thread runs
+        ser = self.ser
+        sel = self._sel
+        fd = self._fd if sel is not None else None
+        read = os.read
+        poll = self._READ_POLL
+        feed = self._feed
 
-    def set_back(self, enable):
-        return self._send_at_command(self._format_command("BACK", enable), is_query=False)
+        while self._running:
+            try:
+                # One read per wakeup: take everything already buffered by the driver
+                # (or block for a single byte), instead of readline()'s byte-at-a-time loop.
+                if sel is not None:
+                    # Both the selector wait and os.read() run without the GIL, so
+                    # command threads keep running while the reader waits for bytes.
+                    if not any(key.fd == fd for key, _ in sel.select(timeout=poll)):
+                        continue
+                    chunk = read(fd, 4096)
+                    if not chunk:
+                        raise serial.SerialException(
+                            "device reports readiness to read but returned no data"
+                        )
+                else:
+                    chunk = ser.read(ser.in_waiting or 1)
+                    if len(chunk) == 1 and ser.in_waiting:
+                        # Woke up on the first byte of a burst: take the rest with it
+                        chunk += ser.read(ser.in_waiting)
+                if chunk:
+                    feed(chunk)
 
-    def get_security(self):
-        return self._send_at_command(self._format_command("SECURITY", query=True), is_query=True)
+            except Exception as e:
+                self.logger.error("Error in reader loop: %s", e)
 
-    def set_security(self, enable):
-        return self._send_at_command(self._format_command("SECURITY", enable), is_query=False)
+    def _dispatch_segments(self, segments, seq):
+        """
+        Hand a batch of segments to the active command, or to async_callback if no
+        command is waiting or the bytes were read before the command started ('seq').
+        """
+        # Lock-free fast path for pure async traffic: if no command is waiting now, none
+        # can own these bytes (_begin_response raises the flag before bumping _cmd_seq).
+        if not self._waiting_for_cmd:
+            self._dispatch_async(segments)
+            return
+        with self._response_cv:
+            if self._waiting_for_cmd and seq == self._cmd_seq:
+                # Store the lines the command owns and keep the others; the waiting
+                # command is only woken once its completion test has passed (and then
+                # for every batch while settling)
+                segments = self._collect(segments)
+                if self._match_idx is not None:
+                    self._response_cv.notify()
+        if segments:
+            self._dispatch_async(segments)
+
+    def _deliver_async(self, segments):
+        """
+        Queue async lines for the callback thread.
+        """
+        with self._callback_cv:
+            queue = self._callback_queue
+            dropped = len(queue) + len(segments) - queue.maxlen
+            if dropped > 0:
+                self._callback_dropped += dropped
+            queue.extend(segments)
+            self._callback_cv.notify()
+
+    def _queue_async(self, segments):
+        """
+        Keep async lines for drain_async(). The reader, the callback thread and command
+        threads all get here, so the queue and its drop count are updated under one lock.
+        """
+        with self._callback_cv:
+            super()._queue_async(segments)
 
-    def get_reset_aux(self):
-        return self._send_at_command(self._format_command("RESET_AUX", query=True), is_query=True)
+    def _callback_loop(self):
+        """
+        Call async_callback for each queued async line, in arrival order. Lines still
+        queued at close() are delivered before the thread exits.
+        """
+        queue = self._callback_queue
+        while True:
+            with self._callback_cv:
+                self._callback_cv.wait_for(lambda: queue or not self._running)
+                if not queue:
+                    return
+                segments = list(queue)
+                queue.clear()
+            callback = self.async_callback
+            if not callback:
+                # The callback was removed meanwhile: keep the lines for drain_async()
+                self._queue_async(segments)
+                continue
+            for seg in segments:
+                try:
+                    callback(seg.decode('utf-8', errors='ignore'))
+                except Exception as e:
+                    self.logger.error("Error in async_callback: %s", e)
+
+    def _begin_response(self, match=None, response_filter=None):
+        """
+        Start collecting lines for a new command/send that completes on the first line
+        satisfying match(line) (None: never, wait for the timeout). Only lines passing
+        response_filter(line) are collected (None: all); the others go to async_callback
+        as they arrive.
+        """
+        with self._response_cv:
+            self._reset_response(match, response_filter)
+            # Flag first, then sequence number: the reader's unlocked check relies on it
+            self._waiting_for_cmd = True
+            self._cmd_seq += 1
 
-    def set_reset_aux(self, enable):
-        return self._send_at_command(self._format_command("RESET_AUX", enable), is_query=False)
+    def _wait_for_response(self, timeout, settle=None, late_settle=None):
+        """
+        Block until the reader reports a line satisfying the match given to
+        _begin_response or 'timeout' seconds pass, then stop collecting. The reader
+        tests each line as it is collected, so there is no wakeup before the match.
+        If 'settle' is given, keep collecting after the match until no new line arrives
+        for 'settle' seconds (for multi-line query replies), but never past the overall
+        deadline. If 'late_settle' is given and the wait times out, keep collecting late
+        replies until none arrives for 'late_settle' seconds, for up to another
+        'timeout' seconds.
+
+        Returns (lines, index of the matching line or None).
+        """
+        monotonic_ns = time.monotonic_ns
+        deadline_ns = monotonic_ns() + int(timeout * 1e9)
+
+        with self._response_cv:
+            lines = self._response_lines
+            found = self._response_cv.wait_for(lambda: self._match_idx is not None, timeout)
+            if late_settle and not found:
+                settle = late_settle
+                deadline_ns = monotonic_ns() + int(timeout * 1e9)
+            elif not found:
+                settle = None
+            if settle:
+                count = self._received
+                while True:
+                    remaining = (deadline_ns - monotonic_ns()) / 1e9
+                    if remaining <= 0 or not self._response_cv.wait_for(
+                        lambda: self._received != count, min(settle, remaining)
+                    ):
+                        break
+                    count = self._received
+            self._end_response()
+            return lines, self._match_idx
 
-    def get_reset_time(self):
-        return self._send_at_command(self._format_command("RESET_TIME", query=True), is_query=True)
+    def _send_at_command(
+        self,
+        command_str,
+        is_query=False,
+        expected_response=_EXPECTED_OK,
+        cmd_timeout=2,
+        response_filter=None,
+        match=None
+    ):
+        """
+        Send an AT command (str, or pre-encoded bytes) and wait for its response. The lines read while waiting
+        are tested (as raw bytes) with 'response_filter' to see if they belong to this command.
+        If a line doesn't pass the filter, it's forwarded to async_callback as soon as it arrives.
 
-    def set_reset_time(self, reset_time):
-        return self._send_at_command(self._format_command("RESET_TIME", reset_time), is_query=False)
+        The wait ends as soon as a line satisfies match(line) (by default: a line passing
+        the filter that contains 'expected_response', or for queries any line passing the
+        filter followed by a short quiet period), or after 'cmd_timeout' seconds.
+        """
+        response_filter, match, settle, default_match = self._command_plan(
+            is_query, expected_response, response_filter, match
+        )
 
-    def get_filter_time(self):
-        return self._send_at_command(self._format_command("FILTER_TIME", query=True), is_query=True)
+        self._log_sent("command", command_str)
 
-    def set_filter_time(self, time_val):
-        return self._send_at_command(self._format_command("FILTER_TIME", time_val), is_query=False)
+        with self._cmd_lock:
+            self._begin_response(match, response_filter)
 
-    def get_ack_time(self):
-        return self._send_at_command(self._format_command("ACK_TIME", query=True), is_query=True)
+            # Send command
+            self.ser.write(self._as_bytes(command_str))
 
-    def set_ack_time(self, time_val):
-        return self._send_at_command(self._format_command("ACK_TIME", time_val), is_query=False)
+            # Wait for the reply (or cmd_timeout); this also marks the command as done
+            lines, match_idx = self._wait_for_response(cmd_timeout, settle)
 
-    def get_router_time(self):
-        return self._send_at_command(self._format_command("ROUTER_TIME", query=True), is_query=True)
+            return self._command_response(
+                command_str, lines, is_query, expected_response,
+                found=(match_idx is not None) if default_match else None
+            )
 
-    def set_router_time(self, time_val):
-        return self._send_at_command(self._format_command("ROUTER_TIME", time_val), is_query=False)
+    # ----------------------------------------------------------------------
+    # Sending user data (i.e., not AT commands)
+    # ----------------------------------------------------------------------
+    def send_message(self, message, expect="SUCCESS", timeout=5):
+        """
+        Send a user data message (str, or any bytes-like object). Wait for 'expect'
+        (e.g. "SUCCESS", str or bytes):
+          • The first line containing the expect token is the "send result".
+          • All other lines are asynchronous data, passed to async_callback as they arrive.
 
-    def group_add(self, group):
-        return self._send_at_command(self._format_command("GROUP_ADD", group), is_query=False)
+        If no line has the expect token, we raise an Exception.
 
-    def group_del(self, group):
-        return self._send_at_command(self._format_command("GROUP_DEL", group), is_query=False)
+        bytes-like messages are written as-is; when sending the same payload repeatedly,
+        encode it once up front instead of passing a str every time.
+        """
+        with self._cmd_lock:
+            # Return as soon as the reader sees the expect token (or wait the full
+            # timeout when there is nothing to expect)
+            match = self._token_match(expect)
+            self._begin_response(match, self._send_filter(match))
 
-    def group_clear(self, enable):
-        return self._send_at_command(self._format_command("GROUP_CLR", enable), is_query=False)
+            self.ser.write(self._as_bytes(message))
 
-    def router_clear(self, enable):
-        return self._send_at_command(self._format_command("ROUTER_CLR", enable), is_query=False)
+            lines, success_idx = self._wait_for_response(timeout)
 
-    def router_save(self, enable):
-        return self._send_at_command(self._format_command("ROUTER_SAVE", enable), is_query=False)
+            return self._send_result(lines, success_idx, expect)
 
-    def router_read(self, enable):
-        return self._send_at_command(self._format_command("ROUTER_READ", enable), is_query=False)
+    def send_message_loop(self, messages, delay=1, expect="SUCCESS", timeout=5, rate_hz=None):
+        """
+        Send multiple user-data messages in a loop.
+        Return the list of responses or errors.
+        Pre-encoded (bytes) messages are written without any per-iteration encoding.
 
-    def get_mac(self):
-        return self._send_at_command(self._format_command("MAC", query=True), is_query=True)
+        Sends are scheduled on absolute deadlines 'delay' seconds apart (or 1/rate_hz),
+        so the time spent waiting for each confirmation does not stretch the cadence.
+        If a send overruns its slot the next one goes out immediately and the schedule
+        restarts from there (no burst to catch up). There is no pause after the last message.
+        """
+        results = []
+        for pause, msg in self._paced(messages, delay, rate_hz):
+            if pause > 0:
+                time.sleep(pause)
+            try:
+                resp = self.send_message(msg, expect=expect, timeout=timeout)
+                results.append(resp)
+            except Exception as e:
+                results.append(f"Error sending '{msg}': {e}")
+        return results
 
-    def get_key(self):
-        return self._send_at_command(self._format_command("KEY", query=True), is_query=True)
+    # ----------------------------------------------------------------------
+    # AT COMMANDS
+    # The get_*/set_* and other AT methods are generated from _AT_METHODS.
+    # ----------------------------------------------------------------------
+    def configure(self, cmd_timeout=2, **settings):
+        """
+        Apply several settings in a single UART round trip, e.g.:
+            lora.configure(CHANNEL=(13, 1), POWER=(20, 1), OPTION=(3, 1))
+        Keys are AT command names, values a parameter or a tuple of parameters.
+        All commands are written at once (separated by CRLF) and the call returns as
+        soon as every one of them is acknowledged with OK. If the batch is not fully
+        acknowledged within cmd_timeout, its late replies are let settle and forwarded
+        as async lines, then the commands are re-sent one at a time. A module that
+        rejects CRLF-joined frames therefore costs the full cmd_timeout plus the settle
+        period before the fallback starts, which is slower than calling the set_* methods
+        directly.
+        Returns the command responses, one per line.
+        """
+        plan = self._configure_plan(settings)
+        if plan is None:
+            return ""
+        commands, batch, response_filter, match = plan
 
-    def set_key(self, key):
-        return self._send_at_command(self._format_command("KEY", key), is_query=False)
+        with self._cmd_lock:
+            self._begin_response(match, response_filter)
+            self.ser.write(batch)
+            lines, done_idx = self._wait_for_response(
+                cmd_timeout, late_settle=self._QUERY_SETTLE
+            )
+            response = self._configure_result(batch, lines, done_idx)
+        if response is not None:
+            return response
+        return "\n".join(self._send_at_command(cmd, cmd_timeout=cmd_timeout) for cmd in commands)
 
     def close(self):
-        """Stop the reader thread and close the serial port."""
+        """Stop the reader and callback threads and close the serial port."""
+        if not self._running:
+            return
         self._running = False
+        # Wake the reader up instead of waiting for its poll interval (or read timeout)
+        if self._sel is not None:
+            os.write(self._wake_w, b"\0")
+        elif hasattr(self.ser, "cancel_read"):
+            self.ser.cancel_read()
         if self._reader_thread.is_alive():
             self._reader_thread.join(timeout=1)
+        with self._callback_cv:
+            self._callback_cv.notify()
+        if self._callback_thread.is_alive():
+            self._callback_thread.join(timeout=1)
+        if self._sel is not None:
+            self._sel.close()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._sel = None
         if self.ser.is_open:
             self.ser.close()
         self.logger.info("Serial port %s closed.", self.port)
 
 
-
+def __getattr__(name):
+    # AsyncLoRaModule lives in E52_xxxNW22S_async so that importing this module does not
+    # import asyncio; it is loaded on first access from here
+    if name == "AsyncLoRaModule":
+        from E52_xxxNW22S_async import AsyncLoRaModule
+        return AsyncLoRaModule
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
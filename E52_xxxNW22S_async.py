@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+"""
+asyncio interface for the E52-xxxNW22S LoRa module (see E52_xxxNW22S for LoRaModule).
+
+Kept in its own module so that LoRaModule users never import asyncio. Line splitting,
+response filtering and result handling are shared with LoRaModule.
+
+Dependencies:
+    - pyserial-asyncio-fast
+
+# Example usage
+>>> async def main():
+>>>     lora = await AsyncLoRaModule.create(port="/dev/ttyUSB0", baudrate=115200)
+>>>     await lora.set_channel(12, 1)
+>>>     await lora.send_message("Hello", expect="SUCCESS", timeout=3)
+>>>     lora.close()
+>>> asyncio.run(main())
+
+"""
+
+import asyncio
+import time
+
+try:
+    import serial_asyncio_fast
+except ImportError:
+    serial_asyncio_fast = None
+
+from E52_xxxNW22S import _EXPECTED_OK, _LoRaCore, _with_at_methods
+
+
+class _LoRaProtocol(asyncio.Protocol):
+    """
+    asyncio protocol feeding received bytes into an AsyncLoRaModule.
+    """
+
+    def __init__(self, module):
+        self.module = module
+
+    def data_received(self, data):
+        try:
+            self.module._feed(data)
+        except Exception as e:
+            self.module.logger.error("Error in reader: %s", e)
+
+    def connection_lost(self, exc):
+        if exc:
+            self.module.logger.error("Serial connection lost: %s", exc)
+
+
+@_with_at_methods
+class AsyncLoRaModule(_LoRaCore):
+    """
+    asyncio counterpart of LoRaModule built on pyserial-asyncio-fast.
+    There is no reader thread: received bytes are parsed in the event loop and a pending
+    command is woken the moment its reply arrives. Writes go straight to the transport
+    (eager writes). Every AT method, configure, send_message and send_message_loop are
+    coroutines; async_callback is called from the event loop.
+    """
+
+    def __init__(self, port="/dev/cu.usbserial-2110", baudrate=115200, timeout=1, retries=3, log_enabled=True):
+        super().__init__(port, baudrate, timeout, retries, log_enabled)
+
+        # Only one command (or send operation) at a time.
+        self._cmd_lock = asyncio.Lock()
+
+        # Future resolved by the protocol when a collected line passes the completion
+        # test, and event set for every collected line (for settling).
+        self._matched = None
+        self._line_arrived = asyncio.Event()
+
+        self.transport = None
+
+    @classmethod
+    async def create(cls, *args, **kwargs):
+        """Construct the module and open its serial connection."""
+        self = cls(*args, **kwargs)
+        await self.open()
+        return self
+
+    async def open(self):
+        """Open the serial port on the running event loop."""
+        if serial_asyncio_fast is None:
+            raise ImportError("AsyncLoRaModule requires the 'pyserial-asyncio-fast' package")
+        try:
+            self.transport, _ = await serial_asyncio_fast.create_serial_connection(
+                asyncio.get_running_loop(),
+                lambda: _LoRaProtocol(self),
+                self.port,
+                baudrate=self.baudrate
+            )
+            self.logger.info("Opened serial port %s at %d baud.", self.port, self.baudrate)
+        except Exception as e:
+            self.logger.error("Failed to open serial port %s: %s", self.port, str(e))
+            raise
+
+    def _dispatch_segments(self, segments, seq):
+        """
+        Event-loop counterpart of LoRaModule._dispatch_segments: collect reply lines and
+        wake the pending command.
+        """
+        # Reads and commands are serialized by the event loop, so 'seq' always matches
+        if self._waiting_for_cmd:
+            received = self._received
+            segments = self._collect(segments)
+            if self._received != received:
+                self._line_arrived.set()
+                matched = self._matched
+                if self._match_idx is not None and matched is not None and not matched.done():
+                    matched.set_result(None)
+        if segments:
+            self._dispatch_async(segments)
+
+    def _deliver_async(self, segments):
+        # Called on the event loop, which is where async_callback runs
+        callback = self.async_callback
+        for seg in segments:
+            try:
+                callback(seg.decode('utf-8', errors='ignore'))
+            except Exception as e:
+                self.logger.error("Error in async_callback: %s", e)
+
+    def _begin_response(self, match=None, response_filter=None):
+        """
+        Start collecting a reply for a new command (see LoRaModule._begin_response).
+        """
+        self._cmd_seq += 1
+        self._reset_response(match, response_filter)
+        self._waiting_for_cmd = True
+
+    async def _wait_for_response(self, timeout, settle=None, late_settle=None):
+        """
+        Coroutine counterpart of LoRaModule._wait_for_response.
+        """
+        lines = self._response_lines
+        deadline_ns = time.monotonic_ns() + int(timeout * 1e9)
+        self._matched = asyncio.get_running_loop().create_future()
+        if self._match_idx is not None:
+            self._matched.set_result(None)
+        try:
+            try:
+                await asyncio.wait_for(self._matched, timeout)
+                found = True
+            except asyncio.TimeoutError:
+                found = False
+            if late_settle and not found:
+                settle = late_settle
+                deadline_ns = time.monotonic_ns() + int(timeout * 1e9)
+            elif not found:
+                settle = None
+            if settle:
+                while True:
+                    remaining = (deadline_ns - time.monotonic_ns()) / 1e9
+                    if remaining <= 0:
+                        break
+                    self._line_arrived.clear()
+                    try:
+                        await asyncio.wait_for(self._line_arrived.wait(), min(settle, remaining))
+                    except asyncio.TimeoutError:
+                        break
+        finally:
+            self._end_response()
+            self._matched = None
+        return lines, self._match_idx
+
+    async def _send_at_command(
+        self,
+        command_str,
+        is_query=False,
+        expected_response=_EXPECTED_OK,
+        cmd_timeout=2,
+        response_filter=None,
+        match=None
+    ):
+        """
+        Coroutine counterpart of LoRaModule._send_at_command.
+        """
+        response_filter, match, settle, default_match = self._command_plan(
+            is_query, expected_response, response_filter, match
+        )
+
+        self._log_sent("command", command_str)
+
+        async with self._cmd_lock:
+            self._begin_response(match, response_filter)
+            self.transport.write(self._as_bytes(command_str))
+            lines, match_idx = await self._wait_for_response(cmd_timeout, settle)
+            return self._command_response(
+                command_str, lines, is_query, expected_response,
+                found=(match_idx is not None) if default_match else None
+            )
+
+    async def configure(self, cmd_timeout=2, **settings):
+        """
+        Coroutine counterpart of LoRaModule.configure.
+        """
+        plan = self._configure_plan(settings)
+        if plan is None:
+            return ""
+        commands, batch, response_filter, match = plan
+
+        async with self._cmd_lock:
+            self._begin_response(match, response_filter)
+            self.transport.write(batch)
+            lines, done_idx = await self._wait_for_response(
+                cmd_timeout, late_settle=self._QUERY_SETTLE
+            )
+            response = self._configure_result(batch, lines, done_idx)
+        if response is not None:
+            return response
+        responses = []
+        for cmd in commands:
+            responses.append(await self._send_at_command(cmd, cmd_timeout=cmd_timeout))
+        return "\n".join(responses)
+
+    async def send_message(self, message, expect="SUCCESS", timeout=5):
+        """
+        Coroutine counterpart of LoRaModule.send_message.
+        """
+        async with self._cmd_lock:
+            match = self._token_match(expect)
+            self._begin_response(match, self._send_filter(match))
+            self.transport.write(self._as_bytes(message))
+            lines, success_idx = await self._wait_for_response(timeout)
+            return self._send_result(lines, success_idx, expect)
+
+    async def send_message_loop(self, messages, delay=1, expect="SUCCESS", timeout=5, rate_hz=None):
+        """
+        Coroutine counterpart of LoRaModule.send_message_loop.
+        """
+        results = []
+        for pause, msg in self._paced(messages, delay, rate_hz):
+            if pause > 0:
+                await asyncio.sleep(pause)
+            try:
+                resp = await self.send_message(msg, expect=expect, timeout=timeout)
+                results.append(resp)
+            except Exception as e:
+                results.append(f"Error sending '{msg}': {e}")
+        return results
+
+    def close(self):
+        """Close the serial transport."""
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        self.logger.info("Serial port %s closed.", self.port)